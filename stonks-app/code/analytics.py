@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import data_utils
+
+
+def calculate_cash_flows_in_pln(historical_prices, purchase_df, assets_df, columns='ticker'):
+    # purchases are positive and sales negative, valued at the PLN price of the day the valuation
+    # starts counting them
+    prices_in_pln = data_utils.convert_prices_to_pln(historical_prices, assets_df.currency)
+    holdings = data_utils.calculate_holdings(purchase_df, prices_in_pln, columns=columns)
+    return (
+        holdings
+        .diff()
+        .fillna(holdings)
+        .pipe(data_utils.multiply_holdings_by_prices, prices_in_pln)
+        .fillna(0)
+    )
+
+
+@st.cache_data(max_entries=50, show_spinner=False)
+def get_cash_flows_in_pln(_historical_prices, purchase_df, _assets_df, cache_date):
+    # same cache key as data_utils.get_daily_value_in_pln_per_portfolio
+    return calculate_cash_flows_in_pln(_historical_prices, purchase_df, _assets_df, columns=['portfolio', 'ticker'])
+
+
+def align_value_and_cash_flows(historical_value, cash_flows):
+    # historical_value is the daily output of calculate_historical_value_in_pln, cash flows on the first
+    # day are already part of the starting value so they are dropped
+    historical_value = (
+        historical_value
+        .set_axis(pd.to_datetime(historical_value.index), axis=0)
+        .ffill()
+        .fillna(0)
+    )
+    cash_flows = (
+        cash_flows
+        .reindex(columns=historical_value.columns, fill_value=0)
+        .loc[lambda x: x.index > historical_value.index[0]]
+        .reindex(historical_value.index)
+        .fillna(0)
+    )
+    return historical_value, cash_flows
+
+
+def calculate_daily_returns(historical_value, cash_flows):
+    # cash flows happen at the end of the day: r_t = (V_t - F_t) / V_{t-1} - 1
+    previous_value = historical_value.shift(1)
+    returns = (historical_value - cash_flows) / previous_value.where(lambda x: x != 0) - 1
+    return returns.iloc[1:].fillna(0)
+
+
+def _years_since_start(index):
+    return ((index - index[0]) / pd.Timedelta(365.25, unit='days')).to_numpy()
+
+
+def _periods_per_year(index):
+    years = _years_since_start(index)[-1]
+    return (len(index) - 1) / years if years > 0 else np.nan
+
+
+def calculate_max_drawdown(returns):
+    wealth_index = (1 + returns).cumprod()
+    return (wealth_index / wealth_index.cummax() - 1).min()
+
+
+def calculate_rolling_volatility(returns, window=30):
+    return returns.rolling(window).std() * np.sqrt(_periods_per_year(returns.index))
+
+
+def _calculate_irr(cash_flows, years, iterations=200):
+    # bisection on all columns at once, npv is decreasing in rate for an investment followed by a payout
+    def npv(rates):
+        return (cash_flows * (1 + rates) ** -years[:, None]).sum(axis=0)
+
+    low = np.full(cash_flows.shape[1], -0.99)
+    high = np.full(cash_flows.shape[1], 10.0)
+    npv_low = npv(low)
+    # annualized rates of short periods can be far outside the starting bracket, so it is widened
+    for _ in range(10):
+        npv_high = npv(high)
+        not_bracketed = np.sign(npv_low) == np.sign(npv_high)
+        if not not_bracketed.any():
+            break
+        # npv has the sign of the last cash flow for rates close to -100% and of the first one for high rates
+        root_above = not_bracketed & (np.sign(npv_high) == np.sign(cash_flows[-1]))
+        high = np.where(root_above, high * 10, high)
+        low = np.where(not_bracketed & ~root_above, -1 + (1 + low) / 10, low)
+        npv_low = npv(low)
+    valid = (np.sign(npv_low) != np.sign(npv(high))) & (cash_flows != 0).any(axis=0)
+    for _ in range(iterations):
+        mid = (low + high) / 2
+        npv_mid = npv(mid)
+        same_sign = np.sign(npv_mid) == np.sign(npv_low)
+        low = np.where(same_sign, mid, low)
+        npv_low = np.where(same_sign, npv_mid, npv_low)
+        high = np.where(same_sign, high, mid)
+
+    return np.where(valid, (low + high) / 2, np.nan)
+
+
+def calculate_irr(historical_value, cash_flows):
+    # investor perspective: starting value and purchases are paid in, final value is paid out
+    investor_cash_flows = -cash_flows
+    investor_cash_flows.iloc[0] -= historical_value.iloc[0]
+    investor_cash_flows.iloc[-1] += historical_value.iloc[-1]
+    investor_cash_flows = investor_cash_flows.loc[lambda x: (x != 0).any(axis=1)]
+    if investor_cash_flows.empty:
+        return pd.Series(np.nan, index=historical_value.columns)
+    return pd.Series(
+        _calculate_irr(investor_cash_flows.to_numpy(), _years_since_start(investor_cash_flows.index)),
+        index=historical_value.columns,
+    )
+
+
+def sum_value_per_portfolio(historical_value):
+    # tickers are forward filled first, otherwise a ticker without a price on a holiday
+    # would drop out of its portfolio total for that day
+    return historical_value.ffill().groupby(level='portfolio', axis=1).sum(min_count=1)
+
+
+def add_total_column(df, name='Total'):
+    return df.assign(**{name: df.sum(axis=1)})
+
+
+def calculate_performance_summary(historical_value, cash_flows):
+    historical_value, cash_flows = align_value_and_cash_flows(historical_value, cash_flows)
+    historical_value, cash_flows = add_total_column(historical_value), add_total_column(cash_flows)
+    returns = calculate_daily_returns(historical_value, cash_flows)
+
+    years = _years_since_start(historical_value.index)[-1]
+    time_weighted_return = (1 + returns).prod() - 1
+    return pd.DataFrame(
+        {
+            'TWR': time_weighted_return,
+            'annualized TWR': (1 + time_weighted_return) ** (1 / years) - 1 if years >= 1 else np.nan,
+            'IRR': calculate_irr(historical_value, cash_flows),
+            'max drawdown': calculate_max_drawdown(returns),
+            'volatility': returns.std() * np.sqrt(_periods_per_year(returns.index)),
+        }
+    )
+
+
+def calculate_historical_rolling_volatility(historical_value, cash_flows, window=30):
+    historical_value, cash_flows = align_value_and_cash_flows(historical_value, cash_flows)
+    historical_value, cash_flows = add_total_column(historical_value), add_total_column(cash_flows)
+    return (
+        calculate_daily_returns(historical_value, cash_flows)
+        .pipe(calculate_rolling_volatility, window=window)
+        .dropna(how='all')
+    )
+
+
+@st.cache_data(max_entries=50, show_spinner=False)
+def get_performance_analytics(_daily_value_per_portfolio, _cash_flows, _assets_df, purchase_df, months_n, cache_date):
+    # keyed like the cached daily valuation and cash flows it is computed from
+    daily_value = data_utils.calculate_historical_value_in_pln(_daily_value_per_portfolio, _assets_df, months_n)
+    asset_cash_flows = _cash_flows.groupby(level='ticker', axis=1).sum()
+    portfolio_daily_value = (
+        data_utils.calculate_historical_value_in_pln_per_portfolio(_daily_value_per_portfolio, months_n)
+        .pipe(sum_value_per_portfolio)
+    )
+    return (
+        calculate_performance_summary(daily_value, asset_cash_flows),
+        calculate_performance_summary(portfolio_daily_value, _cash_flows.groupby(level='portfolio', axis=1).sum()),
+        calculate_historical_rolling_volatility(daily_value, asset_cash_flows).loc[:, 'Total'],
+    )
@@ -57,40 +57,15 @@ def correct_asset_amount_affected_by_split(df: pd.DataFrame, ticker_types: pd.Se
 
 def resample(df, freq):
     time_format = '%Y-%m' if freq == 'M' else '%Y-%m-%d'
+    # grouping on the index keeps this working for frames with MultiIndex columns (multi-portfolio view)
     return (
         df
-        .reset_index()
-        .groupby(pd.Grouper(key='Date', freq=freq))
+        .groupby(pd.Grouper(freq=freq))
         .mean()
-        .reset_index()
-        .assign(Date=lambda x: x.Date.apply(lambda x: x.strftime(time_format)))
-        .set_index('Date')
+        .pipe(lambda x: x.set_axis(x.index.strftime(time_format).rename('Date'), axis=0))
     )
 
 
-def calculate_historical_value(s, purchase_df):
-    if s.name not in purchase_df.ticker.unique():
-        return s
-
-    ticker_purchase_df = (
-        purchase_df
-        .assign(date=lambda x: pd.to_datetime(x.date))
-        .query(f'ticker == "{s.name}"')
-        .sort_values('date')
-    )
-
-    output = s * 0
-    for index, row in ticker_purchase_df.iterrows():
-        if row['operation'] == 'purchase':
-            output.loc[row['date']:] += s.loc[row['date']:] * row['amount']
-        elif row['operation'] == 'sale':
-            output.loc[row['date']:] -= s.loc[row['date']:] * row['amount']
-        else:
-            raise ValueError('unexpected operation')
-
-    return output
-
-
 def calculate_current_assets_from_purchases_and_sales(purchase_df, ticker_info_df):
     return (
         purchase_df
@@ -123,37 +98,113 @@ def add_latest_asset_prices(df, historical_prices):
     )
 
 
-def calculate_historical_value_in_pln(historical_prices, purchase_df, assets_df, months_n=None, frequency='D'):
-    if months_n:
-        historical_prices = historical_prices.loc[pd.Timestamp.now() - pd.Timedelta(months_n * 4, unit='W'):]
+def calculate_signed_amounts(purchase_df):
+    sign = purchase_df.operation.map({'purchase': 1, 'sale': -1})
+    if sign.isna().any():
+        raise ValueError('unexpected operation')
+    return purchase_df.amount * sign
 
-    historical_prices = (
-        historical_prices
-        .apply(calculate_historical_value, purchase_df=purchase_df)
-        .pipe(resample, freq=frequency)
-    )
+
+def convert_prices_to_pln(historical_prices, currencies: pd.Series):
+    # currencies is indexed by ticker, all tickers are converted in a single vectorized pass
     historical_currencies_in_usd = (
         historical_prices
         .loc[:, lambda x: x.columns.str.endswith('USD=X')]
         .rename(columns=lambda x: x.split('USD=X')[0])
         .assign(USD=1)
     )
+    return (
+        historical_prices.loc[:, currencies.index.tolist()] *
+        historical_currencies_in_usd.loc[:, currencies.tolist()].to_numpy()
+    ).div(historical_currencies_in_usd.loc[:, 'PLN'], axis=0)
+
+
+def calculate_holdings(purchase_df, prices, columns='ticker'):
+    # cumulative amounts on the prices index, a ledger entry counts from the first date on or after it
+    # that has a valid price of its ticker, so values and cash flows are booked on the same day
+    holdings = (
+        purchase_df
+        .assign(date=lambda x: pd.to_datetime(x.date), amount=calculate_signed_amounts)
+        .pivot_table(index='date', columns=columns, values='amount', aggfunc='sum', fill_value=0)
+        .pipe(lambda x: x.reindex(x.index.union(prices.index), fill_value=0))
+        .cumsum()
+        .reindex(prices.index)
+    )
+    has_price = prices.loc[:, holdings.columns.get_level_values('ticker')].notna().to_numpy()
+    return holdings.where(has_price).ffill().fillna(0)
+
+
+def multiply_holdings_by_prices(holdings, prices):
+    return pd.DataFrame(
+        holdings.to_numpy() * prices.loc[:, holdings.columns.get_level_values('ticker')].to_numpy(),
+        index=holdings.index,
+        columns=holdings.columns,
+    )
+
+
+def calculate_daily_value_in_pln_per_portfolio(historical_prices, purchase_df, assets_df):
+    # prices are converted once for the union of tickers and multiplied by cumulative holdings
+    # of every portfolio, so N portfolios cost a single valuation; columns are (portfolio, ticker)
+    prices_in_pln = convert_prices_to_pln(historical_prices, assets_df.currency)
+    holdings = calculate_holdings(purchase_df, prices_in_pln, columns=['portfolio', 'ticker'])
+    return multiply_holdings_by_prices(holdings, prices_in_pln)
+
 
+@st.cache_data(max_entries=50, show_spinner=False)
+def get_daily_value_in_pln_per_portfolio(_historical_prices, purchase_df, _assets_df, cache_date):
+    # prices only change with the ledger and cache_date, so the large frames are not hashed
+    return calculate_daily_value_in_pln_per_portfolio(_historical_prices, purchase_df, _assets_df)
+
+
+def calculate_historical_value_in_pln_per_portfolio(daily_value, months_n=None, frequency='D'):
+    if months_n:
+        daily_value = daily_value.loc[pd.Timestamp.now() - pd.Timedelta(months_n * 4, unit='W'):]
+    return daily_value.pipe(resample, freq=frequency)
+
+
+def calculate_historical_value_in_pln(daily_value, assets_df, months_n=None, frequency='D'):
     return (
-        historical_prices
-        .loc[:, assets_df.index.tolist()]
-        .apply(
-            lambda x:
-            (
-                x *
-                historical_currencies_in_usd.loc[:, assets_df.loc[x.name, 'currency']]
-            ) /
-            historical_currencies_in_usd.loc[:, 'PLN']
-        )
+        calculate_historical_value_in_pln_per_portfolio(daily_value, months_n, frequency)
+        .pipe(sum_historical_value_over_portfolios, assets_df)
+    )
+
+
+def sum_historical_value_over_portfolios(df, assets_df):
+    return (
+        df
+        .groupby(level='ticker', axis=1)
+        .sum(min_count=1)
         .loc[:, assets_df.sort_values(['total_pln']).index]
     )
 
 
+def split_historical_value_by_portfolio(df, assets_df):
+    tickers_order = assets_df.sort_values(['total_pln']).index
+    return {
+        portfolio: (
+            df
+            .xs(portfolio, axis=1, level='portfolio')
+            .pipe(lambda x: x.loc[:, tickers_order.intersection(x.columns, sort=False)])
+        )
+        for portfolio in df.columns.unique(level='portfolio')
+    }
+
+
+def calculate_current_value_in_pln_per_portfolio(historical_prices, purchase_df, assets_df):
+    latest_prices_in_pln = convert_prices_to_pln(historical_prices, assets_df.currency).ffill().iloc[-1]
+    return (
+        purchase_df
+        .assign(amount=calculate_signed_amounts)
+        .groupby(['portfolio', 'ticker'])
+        .amount
+        .sum()
+        .pipe(lambda x: x * latest_prices_in_pln.loc[x.index.get_level_values('ticker')].to_numpy())
+        .groupby(level='portfolio')
+        .sum()
+        .round(2)
+    )
+
+
 def reset_purchase_df_index(df):
     df = df.copy().reset_index(drop=True)
     df.index += 1
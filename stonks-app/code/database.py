@@ -168,6 +168,28 @@ def get_user_purchase_data_from_db(passphrase):
     return df
 
 
+# firestore limits the number of values in an "in" query, the main ledger is read separately
+MAX_PORTFOLIOS = 10
+
+
+def get_users_purchase_data_from_db(passphrases: dict) -> pd.DataFrame:
+    # passphrases maps portfolio name to passphrase, all ledgers are read with a single "in" query
+    portfolios = {hash_passphrase(passphrase): portfolio for portfolio, passphrase in passphrases.items()}
+    db = get_firestore_client()
+    df = query_firestore(db, 'purchases', 'hash', 'in', list(portfolios))
+    if df.empty:
+        return pd.DataFrame([], columns=['id', 'ticker', 'amount', 'date', 'operation', 'portfolio'])
+    df = (
+        df
+        .rename(columns={'type': 'operation'})
+        .assign(portfolio=lambda x: x.hash.map(portfolios))
+        .loc[:, ['id', 'ticker', 'amount', 'date', 'operation', 'portfolio']]
+        .sort_values(['portfolio', 'id'])
+        .pipe(reset_purchase_df_index)
+    )
+    return df
+
+
 def add_user_purchase_data_to_db(passphrase, data):
     hash_ = hash_passphrase(passphrase)
     db = get_firestore_client()
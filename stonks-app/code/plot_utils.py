@@ -18,14 +18,14 @@ def get_asset_pie_plot_fig(s: pd.Series, name):
     return fig
 
 
-def generate_historical_net_worth_stacked_area_plot(df):
+def generate_historical_net_worth_stacked_area_plot(df, title='Historical net worth (PLN)'):
     ax = (
         df
         .plot
         .area(
             figsize=(9, 9),
             legend='reverse',
-            title='Historical net worth (PLN)',
+            title=title,
             linewidth=0
         )
     )
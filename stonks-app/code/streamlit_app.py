@@ -7,6 +7,7 @@ import yfinance as yf
 from english_words import english_words_lower_alpha_set
 from streamlit_cookies_manager import EncryptedCookieManager
 
+import analytics
 import data_utils
 import database as db
 import plot_utils
@@ -93,6 +94,50 @@ def handle_purchase_form(
     db.add_user_purchase_data_to_db(passphrase, data)
 
 
+def parse_portfolio_passphrases(text, main_passphrase):
+    # one portfolio per line, either "passphrase" or "name: passphrase"; returns the other portfolios
+    # (the user's own one is always "main") and warnings about lines that were dropped
+    entries = []
+    for line in (text or '').splitlines():
+        if not line.strip():
+            continue
+        # only the first ": " separates a name, so passphrases may contain colons
+        name, separator, passphrase = line.partition(': ')
+        if not separator:
+            name, passphrase = '', line
+        entries.append((name.strip(), passphrase.strip()))
+    typed_names = {name for name, _ in entries}
+
+    passphrases = {}
+    warnings = []
+    generated_n = 1
+    for name, passphrase in entries:
+        label = f'"{name}"' if name else 'without a name'
+        if not passphrase:
+            warnings.append(f'skipped portfolio {label} with empty passphrase')
+            continue
+        if passphrase == main_passphrase or passphrase in passphrases.values():
+            warnings.append(f'skipped portfolio {label} with duplicated passphrase')
+            continue
+        if name == 'main':
+            warnings.append('skipped portfolio named "main", the name is reserved for your own portfolio')
+            continue
+        if name in passphrases:
+            warnings.append(f'skipped portfolio with duplicated name "{name}"')
+            continue
+        if len(passphrases) == db.MAX_PORTFOLIOS - 1:
+            warnings.append(f'only {db.MAX_PORTFOLIOS} portfolios are supported, skipped the remaining ones')
+            break
+        if not name:
+            generated_n += 1
+            while f'portfolio {generated_n}' in typed_names:
+                generated_n += 1
+            name = f'portfolio {generated_n}'
+        passphrases[name] = passphrase
+
+    return passphrases, warnings
+
+
 if __name__ == '__main__':
 
     ## TITLE ##
@@ -184,16 +229,54 @@ if __name__ == '__main__':
             cookies['passphrase'] = user_passphrase
             st.rerun()
 
+    with st.sidebar.expander('multi-portfolio view'):
+        with st.form('portfolios-form'):
+            st.caption(
+                'Passphrases of other portfolios to show together with yours, one per line,'
+                f' optionally prefixed with a name like "business: <passphrase>". Up to {db.MAX_PORTFOLIOS} portfolios.'
+            )
+            user_portfolio_passphrases = st.text_area(
+                'other portfolios passphrases',
+                value=cookies.get('portfolio_passphrases') or '',
+            )
+            submit_portfolios = st.form_submit_button('submit portfolios')
+
+        if submit_portfolios:
+            cookies['portfolio_passphrases'] = user_portfolio_passphrases
+            st.rerun()
+
+        other_portfolio_passphrases, portfolio_warnings = parse_portfolio_passphrases(
+            cookies.get('portfolio_passphrases'), cookies['passphrase']
+        )
+        # filled in after the other ledgers are read
+        portfolio_warnings_container = st.container()
+        for warning in portfolio_warnings:
+            portfolio_warnings_container.warning(warning)
+
     ## DASHBOARD ##
 
     # gather data
+    purchase_df = purchase_df.assign(portfolio='main')
+    if other_portfolio_passphrases:
+        # the main ledger is already loaded, only the other ones are fetched
+        other_purchase_df = db.get_users_purchase_data_from_db(other_portfolio_passphrases)
+        for portfolio in other_portfolio_passphrases:
+            if portfolio not in other_purchase_df.portfolio.values:
+                portfolio_warnings_container.warning(
+                    f'portfolio "{portfolio}" has no operations, check if its passphrase is correct'
+                )
+        purchase_df = (
+            pd.concat([purchase_df, other_purchase_df])
+            .pipe(data_utils.reset_purchase_df_index)
+        )
     if purchase_df.empty:
         if 'random_purchase_data' not in st.session_state:
-            purchase_df = db.generate_random_purchase_data()
+            purchase_df = db.generate_random_purchase_data().assign(portfolio='main')
             st.session_state['random_purchase_data'] = purchase_df
         else:
             purchase_df = st.session_state['random_purchase_data']
         st.info('Data below is randomly generated. Add your own data in the sidebar.')
+    multi_portfolio = purchase_df.portfolio.nunique() > 1
     ticker_info_df = db.create_ticker_df_with_currency_and_type(purchase_df.ticker.unique())
 
     hide_streamlit_style = """
@@ -267,9 +350,54 @@ if __name__ == '__main__':
             value=max_value if max_value < 6 else max_value//2,
         )
 
-    # plot historical area plot using above widgets
+    # plot historical area plot using above widgets, one valuation for all portfolios split into
+    # combined and per-portfolio views afterwards
+    daily_value_per_portfolio = data_utils.get_daily_value_in_pln_per_portfolio(
+        historical_prices, purchase_df, assets_df, cache_date=five_min_unique_date
+    )
     historical_value_in_pln = data_utils.calculate_historical_value_in_pln(
-        historical_prices, purchase_df, assets_df, months_n, frequency
+        daily_value_per_portfolio, assets_df, months_n, frequency
     )
     fig = plot_utils.generate_historical_net_worth_stacked_area_plot(historical_value_in_pln.ffill())
     st.pyplot(fig)
+
+    # compare portfolios side by side
+    if multi_portfolio:
+        portfolio_values = data_utils.calculate_current_value_in_pln_per_portfolio(
+            historical_prices, purchase_df, assets_df
+        )
+        st.plotly_chart(plot_utils.get_asset_pie_plot_fig(portfolio_values, 'Portfolios'), use_container_width=True)
+        with st.expander('Per-portfolio historical net worth (click to show/hide)'):
+            portfolio_historical_values = data_utils.split_historical_value_by_portfolio(
+                data_utils.calculate_historical_value_in_pln_per_portfolio(
+                    daily_value_per_portfolio, months_n, frequency
+                ),
+                assets_df,
+            )
+            for portfolio, df in portfolio_historical_values.items():
+                fig = plot_utils.generate_historical_net_worth_stacked_area_plot(
+                    df.ffill(), title=f'{portfolio} historical net worth (PLN)'
+                )
+                st.pyplot(fig)
+
+    # performance analytics are always computed on daily values of the selected period
+    cash_flows_in_pln = analytics.get_cash_flows_in_pln(
+        historical_prices, purchase_df, assets_df, cache_date=five_min_unique_date
+    )
+    asset_performance, portfolio_performance, rolling_volatility = analytics.get_performance_analytics(
+        daily_value_per_portfolio, cash_flows_in_pln, assets_df, purchase_df, months_n, five_min_unique_date
+    )
+    with st.expander('Performance analytics (click to show/hide)'):
+        st.caption(
+            'TWR - time-weighted return, IRR - money-weighted annual return,'
+            ' volatility - annualized standard deviation of daily returns.'
+            ' IRR is empty when the cash flows have no single return rate, e.g. nothing was invested in the period.'
+        )
+        st.dataframe(asset_performance.style.format('{:.2%}'))
+        if multi_portfolio:
+            st.dataframe(portfolio_performance.style.format('{:.2%}'))
+        st.write('30 day rolling volatility')
+        if rolling_volatility.empty:
+            st.caption('Not enough data for rolling volatility, select a longer period.')
+        else:
+            st.line_chart(rolling_volatility)
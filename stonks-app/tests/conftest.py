@@ -0,0 +1,24 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# app modules live in code/ and import each other by module name
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'code'))
+
+
+def pytest_addoption(parser):
+    parser.addoption('--benchmark', action='store_true', help='run benchmarks')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'benchmark: timing check, only run with --benchmark')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--benchmark'):
+        return
+    skip_benchmark = pytest.mark.skip(reason='needs --benchmark')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip_benchmark)
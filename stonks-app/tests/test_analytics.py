@@ -0,0 +1,142 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+import data_utils
+
+
+def make_prices(index, **tickers):
+    return pd.DataFrame({**tickers, 'PLNUSD=X': 0.25}, index=pd.DatetimeIndex(index, name='Date'))
+
+
+def make_assets_df(tickers):
+    return pd.DataFrame({'currency': 'USD', 'total_pln': 0.0}, index=pd.Index(tickers, name='ticker'))
+
+
+def make_purchase_df(rows):
+    return pd.DataFrame(rows, columns=['ticker', 'amount', 'date', 'operation', 'portfolio'])
+
+
+def calculate_summary(prices, purchase_df, assets_df):
+    daily_value = data_utils.calculate_daily_value_in_pln_per_portfolio(prices, purchase_df, assets_df)
+    return analytics.calculate_performance_summary(
+        data_utils.calculate_historical_value_in_pln(daily_value, assets_df),
+        analytics.calculate_cash_flows_in_pln(prices, purchase_df, assets_df),
+    )
+
+
+def test_twr_equals_price_return_without_trades():
+    index = pd.date_range('2020-01-01', periods=400)
+    aaa = np.linspace(10, 20, len(index)) + np.sin(np.arange(len(index)))
+    prices = make_prices(index, AAA=aaa)
+    purchase_df = make_purchase_df([['AAA', 5, '2020-01-01', 'purchase', 'main']])
+
+    summary = calculate_summary(prices, purchase_df, make_assets_df(['AAA']))
+
+    assert summary.loc['AAA', 'TWR'] == pytest.approx(aaa[-1] / aaa[0] - 1)
+    assert summary.loc['Total', 'TWR'] == pytest.approx(aaa[-1] / aaa[0] - 1)
+
+
+def test_irr_on_two_cash_flows():
+    index = pd.DatetimeIndex(['2020-01-01', pd.Timestamp('2020-01-01') + pd.Timedelta(2 * 365.25, unit='days')])
+    historical_value = pd.DataFrame({'AAA': [100.0, 121.0]}, index=index)
+    cash_flows = pd.DataFrame({'AAA': [0.0, 0.0]}, index=index)
+
+    irr = analytics.calculate_irr(historical_value, cash_flows)
+
+    assert irr['AAA'] == pytest.approx(0.1, abs=1e-6)
+
+
+@pytest.mark.parametrize('end_value', [200.0, 50.0])
+def test_irr_outside_of_initial_bracket(end_value):
+    # annualized returns of a single month are above 1000% and below -99%
+    index = pd.DatetimeIndex(['2021-01-01', '2021-01-31'])
+    historical_value = pd.DataFrame({'AAA': [100.0, end_value]}, index=index)
+    cash_flows = pd.DataFrame({'AAA': [0.0, 0.0]}, index=index)
+
+    irr = analytics.calculate_irr(historical_value, cash_flows)
+
+    assert irr['AAA'] == pytest.approx((end_value / 100) ** (365.25 / 30) - 1, rel=1e-6)
+
+
+def test_max_drawdown():
+    values = pd.Series([100, 120, 90, 110, 60, 80], dtype=float)
+
+    assert analytics.calculate_max_drawdown(values.pct_change().fillna(0)) == pytest.approx(-0.5)
+
+
+def test_purchase_without_price_is_booked_on_next_priced_day():
+    # AAA doesn't trade on the weekend, PLNUSD=X does
+    index = pd.date_range('2021-01-01', '2021-01-05')
+    prices = make_prices(index, AAA=[10, np.nan, np.nan, 11, 12])
+    assets_df = make_assets_df(['AAA'])
+    purchase_df = make_purchase_df([
+        ['AAA', 1, '2021-01-01', 'purchase', 'main'],
+        ['AAA', 100, '2021-01-02', 'purchase', 'main'],
+    ])
+
+    cash_flows = analytics.calculate_cash_flows_in_pln(prices, purchase_df, assets_df)
+    summary = calculate_summary(prices, purchase_df, assets_df)
+
+    assert cash_flows.loc[:, 'AAA'].tolist() == pytest.approx([40, 0, 0, 4400, 0])
+    assert summary.loc['AAA', 'TWR'] == pytest.approx(0.2)
+    assert summary.loc['AAA', 'max drawdown'] == pytest.approx(0)
+
+
+@pytest.mark.benchmark
+def test_twenty_year_daily_history_performance():
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2000-01-01', periods=int(20 * 365.25))
+    tickers = [f'T{i}' for i in range(20)]
+    prices = make_prices(
+        index,
+        **{ticker: 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index)))) for ticker in tickers},
+    )
+    # half of the assets don't trade on weekends
+    prices.loc[prices.index.dayofweek >= 5, tickers[:10]] = np.nan
+    assets_df = make_assets_df(tickers)
+    purchase_df = make_purchase_df([
+        [
+            rng.choice(tickers),
+            rng.integers(1, 10),
+            str(index[rng.integers(len(index))].date()),
+            'purchase',
+            f'portfolio {rng.integers(3)}',
+        ]
+        for _ in range(500)
+    ])
+
+    start = time.perf_counter()
+    daily_value = data_utils.calculate_daily_value_in_pln_per_portfolio(prices, purchase_df, assets_df)
+    cash_flows = analytics.calculate_cash_flows_in_pln(prices, purchase_df, assets_df)
+    historical_value = data_utils.calculate_historical_value_in_pln(daily_value, assets_df)
+    summary = analytics.calculate_performance_summary(historical_value, cash_flows)
+    analytics.calculate_historical_rolling_volatility(historical_value, cash_flows)
+    elapsed = time.perf_counter() - start
+
+    print(f'20 years of daily history for 20 assets in 3 portfolios took {elapsed:.2f}s')
+    assert summary.loc['Total', 'max drawdown'] > -1
+
+
+def test_portfolio_total_keeps_ticker_without_price_on_holiday():
+    index = pd.date_range('2021-01-01', periods=5)
+    prices = make_prices(index, AAA=[10, 10, np.nan, 10, 10], BBB=[20.0] * 5)
+    assets_df = make_assets_df(['AAA', 'BBB'])
+    purchase_df = make_purchase_df([
+        ['AAA', 1, '2021-01-01', 'purchase', 'main'],
+        ['BBB', 1, '2021-01-01', 'purchase', 'main'],
+    ])
+
+    daily_value = data_utils.calculate_daily_value_in_pln_per_portfolio(prices, purchase_df, assets_df)
+    cash_flows = analytics.calculate_cash_flows_in_pln(prices, purchase_df, assets_df, columns=['portfolio', 'ticker'])
+    summary = analytics.calculate_performance_summary(
+        analytics.sum_value_per_portfolio(data_utils.calculate_historical_value_in_pln_per_portfolio(daily_value)),
+        cash_flows.groupby(level='portfolio', axis=1).sum(),
+    )
+
+    assert summary.loc['main', 'TWR'] == pytest.approx(0)
+    assert summary.loc['main', 'max drawdown'] == pytest.approx(0)
+    assert summary.loc['main', 'volatility'] == pytest.approx(0)
@@ -0,0 +1,120 @@
+from functools import reduce
+
+import pandas as pd
+import pytest
+
+import data_utils
+import database as db
+from streamlit_app import parse_portfolio_passphrases
+
+
+@pytest.fixture
+def prices():
+    index = pd.date_range('2021-01-01', periods=5, name='Date')
+    return pd.DataFrame(
+        {'AAA': [10, 11, 12, 13, 14], 'BBB': [20, 20, 21, 22, 20], 'PLNUSD=X': 0.25},
+        index=index,
+        dtype=float,
+    )
+
+
+@pytest.fixture
+def assets_df():
+    return pd.DataFrame(
+        {'currency': 'USD', 'total_pln': [2.0, 1.0]},
+        index=pd.Index(['AAA', 'BBB'], name='ticker'),
+    )
+
+
+@pytest.fixture
+def purchase_df():
+    return pd.DataFrame(
+        [
+            ['AAA', 2, '2021-01-01', 'purchase', 'main'],
+            ['BBB', 1, '2021-01-02', 'purchase', 'main'],
+            ['AAA', 1, '2021-01-03', 'sale', 'main'],
+            ['AAA', 5, '2021-01-02', 'purchase', 'business'],
+        ],
+        columns=['ticker', 'amount', 'date', 'operation', 'portfolio'],
+    )
+
+
+def test_parse_portfolio_passphrases_names():
+    passphrases, warnings = parse_portfolio_passphrases(
+        'first words\nportfolio 2: typed words\nbusiness: other words\nsecond words',
+        'main words',
+    )
+
+    assert passphrases == {
+        'portfolio 3': 'first words',
+        'portfolio 2': 'typed words',
+        'business': 'other words',
+        'portfolio 4': 'second words',
+    }
+    assert warnings == []
+
+
+def test_parse_portfolio_passphrases_passphrase_with_colon():
+    passphrases, _ = parse_portfolio_passphrases('a:b words\nhome: c:d words', 'main words')
+
+    assert passphrases == {'portfolio 2': 'a:b words', 'home': 'c:d words'}
+
+
+def test_parse_portfolio_passphrases_skips_invalid_lines():
+    passphrases, warnings = parse_portfolio_passphrases(
+        'main: other words\n'
+        'main words\n'
+        'home: home words\n'
+        'home: more words\n'
+        'work: home words\n'
+        'empty: \n',
+        'main words',
+    )
+
+    assert passphrases == {'home': 'home words'}
+    assert len(warnings) == 5
+
+
+def test_parse_portfolio_passphrases_max_portfolios():
+    text = '\n'.join(f'words {i}' for i in range(db.MAX_PORTFOLIOS + 2))
+
+    passphrases, warnings = parse_portfolio_passphrases(text, 'main words')
+
+    assert len(passphrases) == db.MAX_PORTFOLIOS - 1
+    assert len(warnings) == 1
+
+
+def test_per_portfolio_values_add_up_to_combined(prices, purchase_df, assets_df):
+    daily_value = data_utils.calculate_daily_value_in_pln_per_portfolio(prices, purchase_df, assets_df)
+    portfolio_values = data_utils.split_historical_value_by_portfolio(
+        data_utils.calculate_historical_value_in_pln_per_portfolio(daily_value),
+        assets_df,
+    )
+
+    pd.testing.assert_frame_equal(
+        reduce(lambda x, y: x.add(y, fill_value=0), portfolio_values.values()),
+        data_utils.calculate_historical_value_in_pln(daily_value, assets_df),
+        check_like=True,
+    )
+
+
+def test_split_historical_value_by_portfolio(prices, purchase_df, assets_df):
+    daily_value = data_utils.calculate_daily_value_in_pln_per_portfolio(prices, purchase_df, assets_df)
+
+    portfolio_values = data_utils.split_historical_value_by_portfolio(
+        data_utils.calculate_historical_value_in_pln_per_portfolio(daily_value),
+        assets_df,
+    )
+
+    assert set(portfolio_values) == {'main', 'business'}
+    # ordered like assets_df by total_pln
+    assert portfolio_values['main'].columns.tolist() == ['BBB', 'AAA']
+    assert portfolio_values['business'].columns.tolist() == ['AAA']
+    assert portfolio_values['business'].loc['2021-01-05', 'AAA'] == pytest.approx(5 * 14 / 0.25)
+
+
+def test_calculate_current_value_in_pln_per_portfolio(prices, purchase_df, assets_df):
+    values = data_utils.calculate_current_value_in_pln_per_portfolio(prices, purchase_df, assets_df)
+
+    assert values['main'] == pytest.approx((1 * 14 + 1 * 20) / 0.25)
+    assert values['business'] == pytest.approx(5 * 14 / 0.25)